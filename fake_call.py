@@ -13,11 +13,18 @@ IMPORTANT: This uses synthetic audio. For realistic testing:
 import asyncio
 import websockets
 import json
+import orjson
 import base64
 import numpy as np
 import time
 import wave
 import io
+from functools import lru_cache
+
+try:
+    import audioop  # C μ-law codec; removed from the stdlib in Python 3.13
+except ImportError:
+    audioop = None
 
 # -------------------------------
 # CONFIGURATION
@@ -34,9 +41,29 @@ MU = 255
 # Longer audio chunks for better transcription
 CHUNK_DURATION = 8.0  # seconds (increased from 6.0)
 
+# Media frame envelope - only the base64 payload changes per chunk
+MEDIA_PREFIX = '{"event":"media","streamSid":"%s","media":{"payload":"' % STREAM_SID
+MEDIA_SUFFIX = '"}}'
+
 # -------------------------------
 # AUDIO UTILS
 # -------------------------------
+def _build_mulaw_lut() -> np.ndarray:
+    """Precompute the G.711 μ-law byte for every 16-bit sample (indexed as uint16)"""
+    BIAS = 0x84
+    CLIP = 32635
+    samples = np.arange(65536, dtype=np.int32)
+    samples[32768:] -= 65536  # uint16 index -> int16 sample value
+    sign = (samples < 0).astype(np.int32)
+    magnitude = np.minimum(np.abs(samples), CLIP) + BIAS
+    exponent = np.frexp(magnitude)[1] - 8  # bit_length(magnitude) - 8
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    lut = (~((sign << 7) | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+    return lut
+
+# Only needed as a fallback when audioop is unavailable
+_ULAW_LUT = _build_mulaw_lut() if audioop is None else None
+
 def linear_to_mulaw(pcm_bytes: bytes, mu: int = MU) -> bytes:
     """Convert 16-bit PCM to μ-law - Production quality"""
     try:
@@ -46,35 +73,24 @@ def linear_to_mulaw(pcm_bytes: bytes, mu: int = MU) -> bytes:
         if len(pcm_bytes) % 2 != 0:
             pcm_bytes = pcm_bytes[:-1]
         
-        pcm = np.frombuffer(pcm_bytes, dtype=np.int16)
-        BIAS = 0x84
-        CLIP = 32635
+        if audioop is not None:
+            return audioop.lin2ulaw(pcm_bytes, 2)
 
-        sign = (pcm < 0)
-        magnitude = np.abs(pcm).astype(np.int32)
-        magnitude = np.minimum(magnitude, CLIP)
-        magnitude = magnitude + BIAS
-
-        exponent = np.zeros(len(magnitude), dtype=np.int32)
-        temp = magnitude.copy()
-        for exp_val in range(7, -1, -1):
-            mask = (temp >= (256 << exp_val)) & (exponent == 0)
-            exponent[mask] = exp_val
-
-        mantissa = (magnitude >> (exponent + 3)) & 0x0F
-        mulaw = ~((sign.astype(np.int32) << 7) | (exponent << 4) | mantissa)
-        mulaw = mulaw & 0xFF
-        return mulaw.astype(np.uint8).tobytes()
+        pcm = np.frombuffer(pcm_bytes, dtype=np.int16)
+        return _ULAW_LUT[pcm.view(np.uint16)].tobytes()
 
     except Exception as e:
         print(f"❌ μ-law encode error: {e}")
         return b''
 
+@lru_cache(maxsize=8)
 def generate_silence(duration_sec: float = 2.0, sample_rate: int = SAMPLE_RATE) -> bytes:
-    """Generate silent PCM bytes for realistic pauses"""
+    """Generate silent PCM bytes for realistic pauses (cached per duration)"""
     samples = int(duration_sec * sample_rate)
-    silence = np.zeros(samples, dtype=np.int16)
-    return silence.tobytes()
+    return bytes(samples * 2)  # zero-filled 16-bit samples
+
+# Decorative noise generated once; each call reads a random window of it
+_NOISE = np.random.randn(1 << 18).astype(np.float32)
 
 def text_to_fake_pcm(text: str, duration_sec: float = 8.0, sample_rate: int = SAMPLE_RATE) -> bytes:
     """
@@ -83,23 +99,45 @@ def text_to_fake_pcm(text: str, duration_sec: float = 8.0, sample_rate: int = SA
     NOTE: This is still synthetic and Whisper will likely hallucinate.
     For real testing, use actual recorded audio or make a live call.
     """
-    t = np.linspace(0, duration_sec, int(sample_rate * duration_sec), endpoint=False)
-    
-    # Mix multiple frequencies to simulate speech patterns
-    audio = (
-        0.05 * np.sin(2 * np.pi * 440 * t) +  # Base tone
-        0.03 * np.sin(2 * np.pi * 880 * t) +  # Harmonic
-        0.02 * np.sin(2 * np.pi * 220 * t) +  # Lower frequency
-        0.01 * np.random.randn(len(t))        # Noise
-    )
+    n_samples = int(sample_rate * duration_sec)
+    t = np.arange(n_samples, dtype=np.float32) * np.float32(1.0 / sample_rate)
+    audio = np.zeros(n_samples, dtype=np.float32)
+    tmp = np.empty_like(audio)
+
+    # Mix multiple frequencies to simulate speech patterns (accumulated in place)
+    for freq, amplitude in (
+        (440, 0.05),  # Base tone
+        (880, 0.03),  # Harmonic
+        (220, 0.02),  # Lower frequency
+    ):
+        np.multiply(t, np.float32(2 * np.pi * freq), out=tmp)
+        np.sin(tmp, out=tmp)
+        tmp *= np.float32(amplitude)
+        audio += tmp
+    if n_samples <= _NOISE.size:  # Noise
+        offset = np.random.randint(0, _NOISE.size - n_samples + 1)
+        noise = _NOISE[offset:offset + n_samples]
+    else:
+        noise = np.random.randn(n_samples).astype(np.float32)
+    np.multiply(noise, np.float32(0.01), out=tmp)
+    audio += tmp
     
     # Add amplitude modulation to simulate speech cadence
-    modulation = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
-    audio = audio * modulation
+    np.multiply(t, np.float32(2 * np.pi * 3), out=tmp)
+    np.sin(tmp, out=tmp)
+    tmp *= np.float32(0.5)
+    tmp += np.float32(0.5)
+    audio *= tmp
     
-    pcm = (audio * 8000).astype(np.int16)  # Lower amplitude
+    audio *= np.float32(8000)  # Lower amplitude
+    pcm = audio.astype(np.int16)
     return pcm.tobytes()
 
+@lru_cache(maxsize=8)
+def _get_mulaw(duration_sec: float) -> bytes:
+    """Synthetic μ-law audio for a given duration (the waveform ignores the phrase text)"""
+    return linear_to_mulaw(text_to_fake_pcm("", duration_sec=duration_sec))
+
 # -------------------------------
 # MAIN SIMULATOR
 # -------------------------------
@@ -108,22 +146,29 @@ async def fake_call():
     print(f"⚠️  NOTE: Using synthetic audio - expect hallucinations!")
     print(f"⚠️  For real testing: Use actual phone call or recorded audio\n")
     
-    async with websockets.connect(WEBSOCKET_URL) as ws:
+    async with websockets.connect(WEBSOCKET_URL, compression=None, max_size=None) as ws:
         print("🔌 Connected to media-stream WebSocket\n")
 
         ai_response_count = 0
+        ai_response_bytes = 0
         
-        # Listener for AI responses
+        # Listener for AI responses (progress printed at most once per second)
         async def listen():
-            nonlocal ai_response_count
+            nonlocal ai_response_count, ai_response_bytes
+            last_log = 0.0
             try:
                 while True:
                     data = await ws.recv()
-                    obj = json.loads(data)
+                    if '"media"' not in data:  # skip parsing non-media frames
+                        continue
+                    obj = orjson.loads(data)
                     if obj.get("event") == "media" and "media" in obj:
                         ai_response_count += 1
-                        payload_len = len(obj["media"]["payload"])
-                        print(f"🤖 AI Response #{ai_response_count} received ({payload_len} bytes)")
+                        ai_response_bytes += len(obj["media"]["payload"])
+                        now = time.monotonic()
+                        if now - last_log >= 1.0:
+                            print(f"🤖 AI Responses: {ai_response_count} received ({ai_response_bytes} bytes)")
+                            last_log = now
             except websockets.exceptions.ConnectionClosed:
                 print("🔌 Listener closed")
             except Exception as e:
@@ -144,8 +189,6 @@ async def fake_call():
             }
         }))
         print("✅ Start event sent\n")
-        
-        await asyncio.sleep(3)  # Wait for greeting
 
         # 2. Simulate user phrases with longer duration
         user_phrases = [
@@ -154,23 +197,34 @@ async def fake_call():
             ("Thank you so much for your help today", CHUNK_DURATION)
         ]
 
+        # Encode audio off the event loop while we wait for the greeting
+        encode_tasks = {
+            duration: asyncio.create_task(asyncio.to_thread(_get_mulaw, duration))
+            for duration in {duration for _, duration in user_phrases}
+        }
+        
+        await asyncio.sleep(3)  # Wait for greeting
+
         for i, (phrase, wait_time) in enumerate(user_phrases, 1):
             print(f"\n👤 User utterance #{i}: '{phrase}'")
             print(f"   ⚠️  Sending {wait_time}s of synthetic audio (will likely be misunderstood)")
             
-            pcm_audio = text_to_fake_pcm(phrase, duration_sec=wait_time)
-            mulaw_audio = linear_to_mulaw(pcm_audio)
+            mulaw_audio = await encode_tasks[wait_time]
 
             # Send audio chunks (simulate streaming)
             chunk_size = 640  # 80ms chunks at 8kHz
-            for j in range(0, len(mulaw_audio), chunk_size):
-                chunk = mulaw_audio[j:j+chunk_size]
-                await ws.send(json.dumps({
-                    "event": "media",
-                    "streamSid": STREAM_SID,
-                    "media": {"payload": base64.b64encode(chunk).decode("utf-8")}
-                }))
-                await asyncio.sleep(0.02)  # 20ms between chunks
+            payloads = [
+                base64.b64encode(mulaw_audio[j:j+chunk_size]).decode("ascii")
+                for j in range(0, len(mulaw_audio), chunk_size)
+            ]
+            # Schedule against a monotonic clock so sleep jitter doesn't accumulate
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            for k, payload in enumerate(payloads, 1):
+                await ws.send(MEDIA_PREFIX + payload + MEDIA_SUFFIX)
+                delay = t0 + k * 0.02 - loop.time()  # 20ms between chunks
+                if delay > 0:
+                    await asyncio.sleep(delay)
             
             print(f"📤 Sent {len(mulaw_audio)} bytes of audio")
             print(f"⏳ Waiting {wait_time + 2}s for AI response...")
@@ -192,7 +246,7 @@ async def fake_call():
         listener_task.cancel()
         
         print(f"\n🏁 Call simulation complete")
-        print(f"📊 Total AI responses received: {ai_response_count}")
+        print(f"📊 Total AI responses received: {ai_response_count} ({ai_response_bytes} bytes)")
         print(f"\n💡 TIP: For accurate testing:")
         print(f"   1. Make a real phone call to your Twilio number")
         print(f"   2. Or record actual speech and modify this script to send it")
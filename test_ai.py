@@ -6,9 +6,10 @@ Fixed version: correctly handles μ-law chunks, converts to PCM, saves WAV, and
 
 import asyncio
 import websockets
-import json
+import orjson
 import base64
 import wave
+import io
 import audioop
 import time
 from pathlib import Path
@@ -53,20 +54,25 @@ def load_audio_file(filepath: str) -> bytes:
         raise ValueError("Unsupported audio format. Use .wav or .m4a")
 
 
-def save_audio_response(mulaw_chunks: list[bytes], output_path: str):
-    """Save collected μ-law chunks as valid WAV"""
+def open_audio_response() -> tuple[io.BytesIO, wave.Wave_write]:
+    """Open an in-memory WAV that received μ-law chunks are decoded into as they arrive"""
+    wav_buffer = io.BytesIO()
+    wav_file = wave.open(wav_buffer, "wb")
+    wav_file.setnchannels(1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(8000)
+    return wav_buffer, wav_file
+
+
+def save_audio_response(wav_buffer: io.BytesIO, wav_file: wave.Wave_write, output_path: str) -> bytes:
+    """Finalize a streamed WAV, save it and return the WAV bytes"""
     print(f"💾 Saving audio response to: {output_path}")
-    # Concatenate all chunks
-    mulaw_data = b"".join(mulaw_chunks)
-    # Convert μ-law to PCM 16-bit
-    pcm_data = audioop.ulaw2lin(mulaw_data, 2)
-    # Save WAV
-    with wave.open(output_path, "wb") as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(8000)
-        wav_file.writeframes(pcm_data)
+    # Closing patches the header sizes; the BytesIO stays open
+    wav_file.close()
+    wav_bytes = wav_buffer.getvalue()
+    Path(output_path).write_bytes(wav_bytes)
     print(f"✅ Audio saved: {output_path}")
+    return wav_bytes
 
 
 async def test_websocket_connection(
@@ -80,55 +86,56 @@ async def test_websocket_connection(
     print(f"📡 Connecting to: {websocket_url}")
     print()
 
-    received_audio_chunks = []
-
     try:
-        async with websockets.connect(websocket_url) as websocket:
+        async with websockets.connect(websocket_url, compression=None, max_size=None) as websocket:
             print("✅ WebSocket connected!\n")
 
             # Send START event
+            stream_sid = "TEST_STREAM_" + str(int(time.time()))
+            call_sid = "TEST_CALL_" + str(int(time.time()))
             start_message = {
                 "event": "start",
                 "sequenceNumber": "1",
                 "start": {
-                    "streamSid": "TEST_STREAM_" + str(int(time.time())),
+                    "streamSid": stream_sid,
                     "accountSid": "TEST_ACCOUNT",
-                    "callSid": "TEST_CALL_" + str(int(time.time())),
+                    "callSid": call_sid,
                     "tracks": ["inbound"],
                     "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1},
                     "customParameters": {"From": "+1234567890", "To": "+0987654321", "caller_email": "test@artbymaudsch.com"},
                 },
-                "streamSid": "TEST_STREAM_" + str(int(time.time())),
+                "streamSid": stream_sid,
             }
 
-            await websocket.send(json.dumps(start_message))
+            # Text frame: the server reads JSON from text messages only
+            await websocket.send(orjson.dumps(start_message).decode())
             print("✅ START event sent\n")
 
             # Wait for greeting
             print("⏳ Waiting for AI greeting...")
             greeting_received = False
+            greeting_buffer, greeting_wav = open_audio_response()
             timeout = 15
             start_time = time.time()
             while not greeting_received and (time.time() - start_time) < timeout:
                 try:
                     response = await asyncio.wait_for(websocket.recv(), timeout=2.0)
-                    data = json.loads(response)
+                    data = orjson.loads(response)
                     if data.get("event") == "media":
                         payload = data.get("media", {}).get("payload")
                         if payload:
                             chunk = base64.b64decode(payload)
                             if len(chunk) > 100:  # skip empty chunks
-                                received_audio_chunks.append(chunk)
+                                greeting_wav.writeframes(audioop.ulaw2lin(chunk, 2))
                                 greeting_received = True
                 except asyncio.TimeoutError:
                     continue
 
             if greeting_received:
-                save_audio_response(received_audio_chunks, "test_greeting_response.wav")
+                wav_bytes = save_audio_response(greeting_buffer, greeting_wav, "test_greeting_response.wav")
                 # Transcribe greeting
-                text = await transcribe_audio(open("test_greeting_response.wav", "rb").read())
+                text = await transcribe_audio(wav_bytes)
                 print(f"🎤 Greeting transcription: {text}")
-                received_audio_chunks.clear()
             else:
                 print("⚠️ No greeting received")
 
@@ -137,46 +144,45 @@ async def test_websocket_connection(
                 print(f"\n📤 Sending test audio: {test_audio_file}")
                 mulaw_audio = load_audio_file(test_audio_file)
                 chunk_size = 160
-                chunks = [mulaw_audio[i : i + chunk_size] for i in range(0, len(mulaw_audio), chunk_size)]
-                for i, chunk in enumerate(chunks):
-                    media_message = {
-                        "event": "media",
-                        "sequenceNumber": str(i + 10),
-                        "media": {
-                            "track": "inbound",
-                            "chunk": str(i),
-                            "timestamp": str(int(time.time() * 1000)),
-                            "payload": base64.b64encode(chunk).decode("utf-8"),
-                        },
-                        "streamSid": start_message["streamSid"],
-                    }
-                    await websocket.send(json.dumps(media_message))
+                audio_view = memoryview(mulaw_audio)
+                # Media envelope serialized once; sequence, chunk, timestamp and payload vary
+                media_template = (
+                    '{"event":"media","sequenceNumber":"%d","media":{"track":"inbound",'
+                    '"chunk":"%d","timestamp":"%d","payload":"%s"},"streamSid":"' + stream_sid + '"}'
+                )
+                for i, offset in enumerate(range(0, len(audio_view), chunk_size)):
+                    chunk = audio_view[offset : offset + chunk_size]
+                    await websocket.send(
+                        media_template
+                        % (i + 10, i, int(time.time() * 1000), base64.b64encode(chunk).decode("ascii"))
+                    )
                     await asyncio.sleep(0.02)  # 20ms
 
-                print(f"✅ Sent {len(chunks)} audio chunks\n")
+                print(f"✅ Sent {(len(audio_view) + chunk_size - 1) // chunk_size} audio chunks\n")
 
                 # Collect AI response
                 print("⏳ Waiting for AI response...")
+                response_buffer, response_wav = open_audio_response()
                 response_start = time.time()
                 while (time.time() - response_start) < 20:
                     try:
                         response = await asyncio.wait_for(websocket.recv(), timeout=2.0)
-                        data = json.loads(response)
+                        data = orjson.loads(response)
                         if data.get("event") == "media":
                             payload = data.get("media", {}).get("payload")
                             if payload:
                                 chunk = base64.b64decode(payload)
                                 if len(chunk) > 100:
-                                    received_audio_chunks.append(chunk)
+                                    response_wav.writeframes(audioop.ulaw2lin(chunk, 2))
                     except asyncio.TimeoutError:
-                        if received_audio_chunks:
+                        if response_wav.getnframes():
                             break
                         continue
 
-                if received_audio_chunks:
-                    save_audio_response(received_audio_chunks, "test_ai_response.wav")
+                if response_wav.getnframes():
+                    wav_bytes = save_audio_response(response_buffer, response_wav, "test_ai_response.wav")
                     # Transcribe AI response
-                    text = await transcribe_audio(open("test_ai_response.wav", "rb").read())
+                    text = await transcribe_audio(wav_bytes)
                     print(f"🎤 AI response transcription: {text}")
                 else:
                     print("⚠️ No AI response received")
@@ -185,10 +191,10 @@ async def test_websocket_connection(
             stop_message = {
                 "event": "stop",
                 "sequenceNumber": "9999",
-                "stop": {"accountSid": "TEST_ACCOUNT", "callSid": start_message["start"]["callSid"]},
-                "streamSid": start_message["streamSid"],
+                "stop": {"accountSid": "TEST_ACCOUNT", "callSid": call_sid},
+                "streamSid": stream_sid,
             }
-            await websocket.send(json.dumps(stop_message))
+            await websocket.send(orjson.dumps(stop_message).decode())
             print("\n✅ STOP event sent")
             await asyncio.sleep(2)
 
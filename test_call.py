@@ -136,25 +136,24 @@ def check_imports():
     print_success("All required packages installed (or optional missing)")
     return True
 
-async def check_server_running():
+async def check_server_running(client: httpx.AsyncClient):
     """Check if the FastAPI server is running"""
     print_info("Checking if server is running...")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:8000/health", timeout=5.0)
-            if response.status_code == 200:
-                print_success("Server is running and responding")
-                return True
-            else:
-                print_error(f"Server returned status {response.status_code}")
-                return False
+        response = await client.get("http://localhost:8000/health", timeout=5.0)
+        if response.status_code == 200:
+            print_success("Server is running and responding")
+            return True
+        else:
+            print_error(f"Server returned status {response.status_code}")
+            return False
     except Exception as e:
         print_error("Server is NOT running")
         print_info("Start server with: python -m uvicorn main:app --reload")
         return False
 
-async def check_webhook_endpoint():
+async def check_webhook_endpoint(client: httpx.AsyncClient):
     """Check if webhook endpoint is accessible"""
     print_info("Checking webhook endpoint...")
     
@@ -169,27 +168,26 @@ async def check_webhook_endpoint():
     print_info(f"Testing: {webhook_url}")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                webhook_url,
-                data={
-                    "From": "+1234567890",
-                    "To": os.getenv('TWILIO_PHONE_NUMBER', '+10000000000'),
-                    "CallSid": "TEST123"
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                if '<Response>' in response.text:
-                    print_success("Webhook endpoint responding with valid TwiML")
-                    return True
-                else:
-                    print_error("Webhook responded but no TwiML found")
-                    return False
+        response = await client.post(
+            webhook_url,
+            data={
+                "From": "+1234567890",
+                "To": os.getenv('TWILIO_PHONE_NUMBER', '+10000000000'),
+                "CallSid": "TEST123"
+            },
+            timeout=10.0
+        )
+        
+        if response.status_code == 200:
+            if '<Response>' in response.text:
+                print_success("Webhook endpoint responding with valid TwiML")
+                return True
             else:
-                print_error(f"Webhook returned status {response.status_code}")
+                print_error("Webhook responded but no TwiML found")
                 return False
+        else:
+            print_error(f"Webhook returned status {response.status_code}")
+            return False
     except Exception as e:
         print_error(f"Cannot reach webhook: {e}")
         print_warning("Make sure ngrok is running and WEBSOCKET_URL is correct")
@@ -232,8 +230,10 @@ async def main():
     results['Required Packages'] = check_imports()
     # audioop check is now only informative
     results['Audioop Module'] = True
-    results['Server Running'] = await check_server_running()
-    results['Webhook Endpoint'] = await check_webhook_endpoint()
+    # One client for both HTTP checks
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        results['Server Running'] = await check_server_running(client)
+        results['Webhook Endpoint'] = await check_webhook_endpoint(client)
     
     print_summary(results)
 
@@ -2,6 +2,7 @@
 import asyncio
 import websockets
 import json
+import orjson
 import base64
 import numpy as np
 import sounddevice as sd
@@ -10,20 +11,20 @@ import soundfile as sf
 # -----------------------------
 # μ-law → PCM decoder
 # -----------------------------
+def _decode_mulaw_sample(byte: int) -> int:
+    """Decode a single G.711 μ-law byte to a 16-bit PCM sample."""
+    byte = ~byte & 0xFF
+    exponent = (byte >> 4) & 0x07
+    mantissa = byte & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return -magnitude if byte & 0x80 else magnitude
+
+# Every μ-law byte decoded once, already scaled to float32 in [-1.0, 1.0]
+_ULAW2F32 = np.array([_decode_mulaw_sample(b) / 32768.0 for b in range(256)], dtype=np.float32)
+
 def mulaw_to_linear_float(mulaw_bytes: bytes) -> np.ndarray:
     """Convert μ-law bytes to float32 PCM in range [-1.0, 1.0]."""
-    mu_law = np.frombuffer(mulaw_bytes, dtype=np.uint8)
-    mu_law = np.bitwise_xor(mu_law, 0xFF)
-    sign = np.bitwise_and(mu_law, 0x80)
-    exponent = np.bitwise_and(mu_law, 0x70) >> 4
-    mantissa = np.bitwise_and(mu_law, 0x0F)
-    magnitude = ((mantissa << 4) + 8) << (exponent + 2)
-    pcm = magnitude.astype(np.int16)
-    pcm[sign != 0] = -pcm[sign != 0]
-
-    # Convert to float32 in [-1.0, 1.0]
-    pcm_float = pcm.astype(np.float32) / 32768.0
-    return pcm_float
+    return _ULAW2F32[np.frombuffer(mulaw_bytes, dtype=np.uint8)]
 
 # -----------------------------
 # WebSocket test flow
@@ -31,7 +32,7 @@ def mulaw_to_linear_float(mulaw_bytes: bytes) -> np.ndarray:
 async def test_flow():
     ws_url = "wss://uncatenated-sherrell-diminishingly.ngrok-free.dev/api/twilio/media-stream"  
 
-    async with websockets.connect(ws_url) as websocket:
+    async with websockets.connect(ws_url, compression=None, max_size=None) as websocket:
         print("🔌 Connected to WebSocket")
 
         # Send fake START event to simulate Twilio call
@@ -58,20 +59,24 @@ async def test_flow():
                 print("⏱️ Timeout waiting for audio")
                 break
 
-            data = json.loads(message)
+            data = orjson.loads(message)
             if data.get("event") == "media":
                 payload = data.get("media", {}).get("payload")
                 if payload:
                     audio_bytes = base64.b64decode(payload)
                     pcm_float = mulaw_to_linear_float(audio_bytes)
 
+                    # Save to WAV file in a worker thread while the audio plays
+                    write_task = asyncio.create_task(
+                        asyncio.to_thread(sf.write, "ai_greeting.wav", pcm_float, 8000, subtype="PCM_16")
+                    )
+
                     # Play audio
                     sd.play(pcm_float, samplerate=8000)
-                    sd.wait()
+                    await asyncio.to_thread(sd.wait)  # keep the loop free for the write
                     print("🔊 Greeting played!")
 
-                    # Save to WAV file
-                    sf.write("ai_greeting.wav", pcm_float, 8000, subtype="PCM_16")
+                    await write_task
                     print("💾 Greeting saved as 'ai_greeting.wav'")
                     break
 
@@ -1,3 +1,4 @@
+import asyncio
 from app.services.shopify_client import ShopifyClient
 
 shopify_client = ShopifyClient()
@@ -12,9 +13,17 @@ try:
     
     if orders:
         last_order = orders[-1]
-        for variant in last_order.get("line_items", []):
-            product_id = variant.get("product_id")
-            stock = shopify_client.check_stock(product_id)
+        line_items = last_order.get("line_items", [])
+
+        async def check_all_stock():
+            # check_stock is blocking; run the lookups concurrently in threads
+            return await asyncio.gather(*[
+                asyncio.to_thread(shopify_client.check_stock, variant.get("product_id"))
+                for variant in line_items
+            ])
+
+        stocks = asyncio.run(check_all_stock())
+        for variant, stock in zip(line_items, stocks):
             print(f"Product {variant['name']} stock: {stock}")
         shipping_estimate = shopify_client.get_shipping_estimate(last_order['name'])
         print(f"Shipping estimate for last order: {shipping_estimate}")